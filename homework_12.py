@@ -1,27 +1,76 @@
 import json
+from bisect import bisect_left, bisect_right
 from collections import UserDict
-from datetime import datetime
-import re
+from datetime import date, datetime
+from itertools import islice
 from json import JSONDecodeError
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+np = None
+_scan_bytes = None
+_NUMBA_SCAN_THRESHOLD = 100_000
+
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+def _load_scan_bytes():
+    global np, _scan_bytes
+    if _scan_bytes is not None:
+        return _scan_bytes
+    try:
+        import numpy as np
+        from numba import njit
+    except ImportError:
+        _scan_bytes = False
+        return _scan_bytes
+
+    @njit(cache=True)
+    def scan_bytes(buf, offsets, needle):
+        hits = np.empty(len(offsets), dtype=np.int64)
+        n_hits = 0
+        m = len(needle)
+        for i in range(len(offsets)):
+            start = offsets[i]
+            end = offsets[i + 1] - 1 if i + 1 < len(offsets) else len(buf)
+            for j in range(start, end - m + 1):
+                k = 0
+                while k < m and buf[j + k] == needle[k]:
+                    k += 1
+                if k == m:
+                    hits[n_hits] = i
+                    n_hits += 1
+                    break
+        return hits[:n_hits]
+
+    _scan_bytes = scan_bytes
+    return _scan_bytes
+
 
 class Field:
-    pass
+    __slots__ = ()
 
 
 class NameField(Field):
+    __slots__ = ('value',)
+
     def __init__(self, name: str):
         super().__init__()
-        self.value = name
-
-    @property
-    def value(self):
-        return self.__value
-
-    @value.setter
-    def value(self, new_value):
-        if self.__validate_name__(new_value):
-            self.__value = new_value
+        if self.__validate_name__(name):
+            self.value = name
 
     @staticmethod
     def __validate_name__(new_value):
@@ -33,232 +82,383 @@ class NameField(Field):
 
 
 class PhoneField(Field):
+    __slots__ = ('value', '__code')
+
     def __init__(self, phone: str):
         super().__init__()
-        self.value = phone
-
-    @property
-    def value(self):
-        return self.__value
-
-    @value.setter
-    def value(self, new_value):
-        if self.__validate_phone__(new_value):
-            self.__value = new_value
+        if self.__validate_phone__(phone):
+            self.value = phone
+            self.__code = phone.lstrip('+').lstrip('0')
+
+    @classmethod
+    def from_trusted(cls, value: str):
+        if not isinstance(value, str):
+            return cls(value)
+        phone = cls.__new__(cls)
+        phone.value = value
+        phone.__code = value.lstrip('+').lstrip('0')
+        return phone
 
     def get_phone_code(self):
-        return str(self.value).lstrip('+').lstrip('0')
+        return self.__code
 
     @staticmethod
     def __validate_phone__(value):
         if value is None:
             raise ValueError('Phone cannot be None')
+        if not isinstance(value, str):
+            raise ValueError('Phone is not correct')
         if str(value).strip() == '':
             raise ValueError('Phone cannot be empty or whitespaces')
-        if re.match(r"^\+?[\d]{10,14}$", value):
+        s = value[1:] if value.startswith('+') else value
+        if 10 <= len(s) <= 14 and s.isascii() and s.isdigit():
             return True
         raise ValueError('Phone is not correct')
 
 
 class BirthDayField(Field):
+    __slots__ = ('value', 'date')
+
     def __init__(self, b: str):
         super().__init__()
         self.date = None
-        self.value = b
-
-    @property
-    def value(self):
-        return self.__value
-
-    @value.setter
-    def value(self, new_value):
-        if self.__validate_birthday__(new_value):
-            self.__value = new_value
+        if self.__validate_birthday__(b):
+            self.value = self.date.date().isoformat()
 
     def __validate_birthday__(self, value):
         if value is None:
             raise ValueError('Birthday cannot be None')
+        if not isinstance(value, str):
+            raise ValueError('Birthday is not correct, should be YYYY-MM-DD')
         if str(value).strip() == '':
             raise ValueError('Birthday cannot be empty or whitespaces')
-        if re.match(r"^\d{4}\-\d?\d\-\d?\d$", value):
-            self.date = datetime.fromisoformat(value)
+        parts = value.split('-')
+        if len(parts) == 3 and len(parts[0]) == 4 and 1 <= len(parts[1]) <= 2 and 1 <= len(parts[2]) <= 2 \
+                and all(p.isascii() and p.isdigit() for p in parts):
+            self.date = datetime(int(parts[0]), int(parts[1]), int(parts[2]))
             if self.date > datetime.now():
                 raise ValueError('Birthday cannot be than now')
             return True
         raise ValueError('Birthday is not correct, should be YYYY-MM-DD')
 
+    @classmethod
+    def from_trusted(cls, value: str):
+        try:
+            year, month, day = value.split('-')
+            date_value = datetime(int(year), int(month), int(day))
+        except (AttributeError, ValueError):
+            # let the validating constructor report what is wrong
+            return cls(value)
+        b = cls.__new__(cls)
+        b.date = date_value
+        b.value = b.date.date().isoformat()
+        return b
+
     def get_datetime(self):
         return self.date
 
 
 class Record:
+    __slots__ = ('name', 'phones', '__birthday', '_str_cache', '_days_cache', '_book')
+
     name: NameField
-    birthday: BirthDayField = None
 
     def __init__(self, name: str, b: BirthDayField = None):
+        self._book = None
+        self._str_cache = None
+        self._days_cache = None
         self.name = NameField(name)
         self.phones = []
-        if b is not None:
-            self.birthday = b
+        self.birthday = b
+
+    @property
+    def birthday(self):
+        return self.__birthday
+
+    @birthday.setter
+    def birthday(self, b: BirthDayField):
+        self.__birthday = b
+        self._str_cache = None
+        self._days_cache = None
+        if self._book is not None:
+            self._book.invalidate_birthdays()
+
+    @classmethod
+    def _from_trusted(cls, json_record: dict):
+        record = cls(json_record['name'])
+        if 'birthday' in json_record:
+            record.birthday = BirthDayField.from_trusted(json_record['birthday'])
+        if 'phones' in json_record:
+            record.phones = [PhoneField.from_trusted(phone) for phone in json_record['phones']]
+        return record
 
     def add_phone(self, phone: PhoneField):
         self.phones.append(phone)
+        self._str_cache = None
+        if self._book is not None:
+            self._book.index_phone(self, phone)
 
     def edit_phone(self, new_phone: PhoneField):
-        self.phones.clear()
+        old_phones = self.phones
+        self.phones = []
+        self._str_cache = None
+        if self._book is not None:
+            for phone in old_phones:
+                self._book.unindex_phone(self, phone)
         self.add_phone(new_phone)
 
     def delete_phone(self, number: str):
         phone_code = number.lstrip('+').lstrip('0')
-        for s in self.phones:
+        for i, s in enumerate(self.phones):
             if s.get_phone_code() == phone_code:
-                self.phones.remove(s)
+                del self.phones[i]
+                self._str_cache = None
+                if self._book is not None and all(p.value != s.value for p in self.phones):
+                    self._book.unindex_phone(self, s)
                 break
 
+    @staticmethod
+    def _birthday_in(year: int, bd: datetime):
+        try:
+            return date(year, bd.month, bd.day)
+        except ValueError:
+            # 29 February outside a leap year
+            return date(year, 2, 28)
+
     def days_to_birthday(self):
-        now = datetime.now()
+        today = date.today()
+        if self._days_cache is not None and self._days_cache[0] == today.toordinal():
+            return self._days_cache[1]
         bd = self.birthday.get_datetime()
 
-        delta1 = datetime(now.year, bd.month, bd.day)
-        delta2 = datetime(now.year + 1, bd.month, bd.day)
+        candidate = self._birthday_in(today.year, bd)
+        if candidate < today:
+            candidate = self._birthday_in(today.year + 1, bd)
 
-        return ((delta1 if delta1 > now else delta2) - now).days
+        days = (candidate - today).days
+        self._days_cache = (today.toordinal(), days)
+        return days
 
     def __str__(self):
+        today = date.today().toordinal()
+        if self._str_cache is not None and self._str_cache[0] == today:
+            return self._str_cache[1]
         result = self.name.value + '\t| ' + ', '.join(x.value for x in self.phones)
         if self.birthday is not None:
             result += '\t| ' + self.birthday.value + '\t| next birthday in ' + str(self.days_to_birthday()) + ' days'
-        return result + '\n'
+        result += '\n'
+        self._str_cache = (today, result)
+        return result
 
     def get_json_data(self):
         result = {'name': self.name.value}
         if self.birthday:
             result['birthday'] = self.birthday.value
-        result['phones'] = []
-        for phone in self.phones:
-            result['phones'].append(phone.value)
+        result['phones'] = [phone.value for phone in self.phones]
         return result
 
 
 class AddressBook:
-    def __init__(self, max_page: int = None):
+    def __init__(self, max_page: int = None, use_numba: bool = False):
         self.data = {}
+        self.use_numba = use_numba
+        self._phone_index = {}
+        self._name_index_ci = {}
+        self._search_dirty = True
+        self._bd_dirty = True
         if max_page is None:
             max_page = 3
         self.max_page = max_page
 
     def add_record(self, r: Record):
+        old = self.data.get(r.name.value)
+        if old is not None and old is not r:
+            for phone in old.phones:
+                self.unindex_phone(old, phone)
+            old._book = None
+            self._name_index_ci[old.name.value.casefold()].remove(old)
         self.data[r.name.value] = r
+        if old is not r:
+            self._name_index_ci.setdefault(r.name.value.casefold(), []).append(r)
+        r._book = self
+        self._search_dirty = True
+        self._bd_dirty = True
+        for phone in r.phones:
+            self.index_phone(r, phone)
+
+    def index_phone(self, r: Record, phone: PhoneField):
+        records = self._phone_index.setdefault(phone.value, [])
+        if r not in records:
+            records.append(r)
+        self._search_dirty = True
+
+    def unindex_phone(self, r: Record, phone: PhoneField):
+        self._search_dirty = True
+        records = self._phone_index.get(phone.value)
+        if records and r in records:
+            records.remove(r)
+            if not records:
+                del self._phone_index[phone.value]
 
     def __iter__(self):
-        page = []
-        for name, record in self.items():
-            page.append(record)
-            if len(page) == self.max_page:
-                yield page
-                page = []
-        if page:
+        it = iter(self.data.values())
+        while page := list(islice(it, self.max_page)):
             yield page
 
     def __getitem__(self, page_number: int):
-        p = 1
-        for page in self:
-            if page_number == p:
-                return page
-            p += 1
-        raise KeyError('index out of range in book, max page: ' + str(p))
+        start = (page_number - 1) * self.max_page
+        if page_number < 1 or start >= len(self.data):
+            pages = -(-len(self.data) // self.max_page)
+            raise KeyError('index out of range in book, max page: ' + str(pages))
+        return list(islice(self.data.values(), start, start + self.max_page))
 
     def find_by_name(self, n: str, use_any=False):
-        result = []
-        for name, record in self.data.items():
-            if use_any and n.lower() in name.lower():
-                result.append(record)
-            elif not use_any and name.lower() == n.lower():
-                result.append(record)
-        return result
+        if not use_any:
+            return list(self._name_index_ci.get(n.casefold(), ()))
+        self._ensure_search_bufs()
+        if self._use_numba():
+            return self._scan_numba('_name_nb', self._name_lc_joined, n.casefold())
+        return self._scan(self._name_lc_joined, self._name_lc_offsets, n.casefold())
 
     def find_by_phone(self, number: str, use_any=False):
+        if not use_any:
+            return list(self._phone_index.get(number, ()))
+        self._ensure_search_bufs()
+        if self._use_numba():
+            return self._scan_numba('_phone_nb', self._phone_lc_joined, number.casefold())
+        return self._scan(self._phone_lc_joined, self._phone_lc_offsets, number.casefold())
+
+    def _ensure_search_bufs(self):
+        if not self._search_dirty:
+            return
+        records = list(self.data.values())
+        self._name_lc_joined, self._name_lc_offsets = self._join_lc(r.name.value for r in records)
+        self._phone_lc_joined, self._phone_lc_offsets = self._join_lc(
+            '\1'.join(p.value for p in r.phones) for r in records)
+        self._search_records = records
+        self._name_nb = None
+        self._phone_nb = None
+        self._search_dirty = False
+
+    def _use_numba(self):
+        if not self.use_numba or len(self._search_records) <= _NUMBA_SCAN_THRESHOLD:
+            return False
+        return bool(_load_scan_bytes())
+
+    def _scan_numba(self, attr: str, joined: str, needle: str):
+        bufs = getattr(self, attr)
+        if bufs is None:
+            buf = np.frombuffer(joined.encode(), dtype=np.uint8)
+            offsets = np.concatenate((np.zeros(1, dtype=np.int64), np.flatnonzero(buf == 0) + 1))
+            bufs = (buf, offsets)
+            setattr(self, attr, bufs)
+        hits = _scan_bytes(bufs[0], bufs[1], np.frombuffer(needle.encode(), dtype=np.uint8))
+        return [self._search_records[i] for i in hits]
+
+    @staticmethod
+    def _join_lc(values):
+        parts = []
+        offsets = []
+        pos = 0
+        for v in values:
+            v = v.casefold()
+            parts.append(v)
+            offsets.append(pos)
+            pos += len(v) + 1
+        return '\0'.join(parts), offsets
+
+    def _scan(self, buf: str, offsets: list, needle: str):
         result = []
-        for _, record in self.data.items():
-            for p in record.phones:
-                if use_any and number.lower() in p.value.lower():
-                    result.append(record)
-                    break
-                elif not use_any and number.lower() == p.value.lower():
-                    result.append(record)
-                    break
+        if not offsets:
+            return result
+        pos = buf.find(needle)
+        while pos != -1:
+            i = bisect_right(offsets, pos) - 1
+            result.append(self._search_records[i])
+            if i + 1 == len(offsets):
+                break
+            pos = buf.find(needle, offsets[i + 1])
+        return result
+
+    def invalidate_birthdays(self):
+        self._bd_dirty = True
+
+    def _ensure_birthdays(self):
+        if not self._bd_dirty:
+            return
+        entries = []
+        for i, r in enumerate(self.data.values()):
+            if r.birthday is not None:
+                bd = r.birthday.get_datetime()
+                entries.append((bd.month * 32 + bd.day, i, r))
+        entries.sort(key=lambda e: e[:2])
+        self._bd_keys = [e[0] for e in entries]
+        self._bd_records = [e[2] for e in entries]
+        self._bd_dirty = False
+
+    def next_birthdays(self, k: int):
+        if k <= 0:
+            return []
+        self._ensure_birthdays()
+        now = datetime.now()
+        i = bisect_left(self._bd_keys, now.month * 32 + now.day)
+        result = self._bd_records[i:i + k]
+        if len(result) < k:
+            result += self._bd_records[:min(i, k - len(result))]
         return result
 
     def items(self):
         return self.data.items()
 
     def save_to_file(self, filename):
-        address_book_json = []
-        for _, record in self.data.items():
-            address_book_json.append(record.get_json_data())
-        with open(filename, "w+") as fh:
-            json.dump(address_book_json, fh)
+        address_book_json = [record.get_json_data() for record in self.data.values()]
+        with open(filename, "wb") as fh:
+            fh.write(_json_dumps(address_book_json))
 
     def load_from_file(self, filename):
-        with open(filename, "r+") as fh:
+        with open(filename, "rb") as fh:
             try:
-                address_book_json = json.load(fh)
+                address_book_json = _json_loads(fh.read())
             except JSONDecodeError as e:
                 return str(e)
         self.data = {}
+        self._phone_index = {}
+        self._name_index_ci = {}
+        self._search_dirty = True
+        self._bd_dirty = True
         record_index = 0
         for json_record in address_book_json:
             try:
                 if 'name' in json_record:
-                    record = Record(json_record['name'])
-                    if 'birthday' in json_record:
-                        record.birthday = BirthDayField(json_record['birthday'])
-                    if 'phones' in json_record:
-                        for phone in json_record['phones']:
-                            record.add_phone(PhoneField(phone))
-                    self.add_record(record)
+                    self.add_record(Record._from_trusted(json_record))
             except ValueError as e:
                 return 'Validation error in ' + str(record_index) + ' record: ' + str(e)
 
 
+_RULES = {
+    'add': (2, None, 'Give me name and phone please, birthday optional'),
+    'change': (2, 2, 'Give me name and phone please'),
+    'birthday': (2, 2, 'Give me name and birthday please'),
+    'birthdays': (1, 1, 'Give me number of upcoming birthdays please'),
+    'phone': (1, 1, 'Enter user name'),
+    'show': (1, 1, 'Show must be with parameter `all` or name'),
+    'find': (1, 1, 'Find must be with one parameter (part of phone or name)'),
+}
+
+
 def input_error(func):
     def inner(command, *inputs):
-        if command == 'add':
-            if inputs and len(inputs) > 1:
-                return func(*inputs)
-            else:
-                return 'Give me name and phone please, birthday optional'
-        if command == 'change':
-            if inputs and len(inputs) == 2:
-                return func(*inputs)
-            else:
-                return 'Give me name and phone please'
-        if command == 'birthday':
-            if inputs and len(inputs) == 2:
-                return func(*inputs)
-            else:
-                return 'Give me name and birthday please'
-        if command == 'phone':
-            if inputs and len(inputs) == 1:
-                return func(*inputs)
-            else:
-                return 'Enter user name'
         if command == 'hello':
             if len(inputs) > 0:
                 return func(inputs[0])
             return func(None)
-        if command == 'show':
-            if inputs and len(inputs) == 1:
-                return func(*inputs)
-            else:
-                return 'Show must be with parameter `all` or name'
-        if command == 'find':
-            if inputs and len(inputs) == 1:
-                return func(*inputs)
-            else:
-                return 'Find must be with one parameter (part of phone or name)'
-
-        return 'Not correct validation'
+        rule = _RULES.get(command)
+        if rule is None:
+            return 'Not correct validation'
+        lo, hi, msg = rule
+        if len(inputs) < lo or (hi is not None and len(inputs) > hi):
+            return msg
+        return func(*inputs)
 
     return inner
 
@@ -303,55 +503,66 @@ def change(n, p):
 
 @input_error
 def show(n):
-    info_line = ''
+    parts = []
     if n == 'all':
         p = 1
         for page in book:
-            info_line += '====\tpage: ' + str(p) + '\t====\n'
-            for record in page:
-                info_line += str(record)
+            parts.append('====\tpage: ' + str(p) + '\t====\n')
+            parts.extend(str(record) for record in page)
             p += 1
     else:
         try:
             page_number = int(n, 10)
             if page_number < 1:
                 page_number = 1
-            for record in book[page_number]:
-                info_line += str(record)
+            parts.extend(str(record) for record in book[page_number])
         except KeyError as e:
             return str(e)
         except ValueError:
             items = book.find_by_name(n)
             if len(items) == 0:
                 return 'Name is not found'
-            for record in items:
-                info_line += str(record)
-    return info_line
+            parts.extend(str(record) for record in items)
+    return ''.join(parts)
 
 
 @input_error
 def find(n):
-    items = book.find_by_name(n, use_any=True)
-    if len(items) == 0:
-        items = book.find_by_phone(n, use_any=True)
+    partial = book.find_by_name(n, use_any=True)
+    if len(partial) == 0:
+        partial = book.find_by_phone(n, use_any=True)
+    items = list(dict.fromkeys(book.find_by_name(n) + book.find_by_phone(n) + partial))
     if len(items) == 0:
         return 'Not found record by ' + str(n)
-    info_line = ''
-    for record in items:
-        info_line += str(record)
-    return info_line
+    return ''.join(str(record) for record in items)
 
 
 @input_error
 def birthday(n, b):
-    for record in book.find_by_name(n):
-        try:
-            b = BirthDayField(b)
-            record.birthday = b
-            return 'Birthday set successfully'
-        except Exception as e:
-            return str(e)
-    return 'Name is not found'
+    items = book.find_by_name(n)
+    if len(items) == 0:
+        return 'Name is not found'
+    try:
+        bd = BirthDayField(b)
+    except Exception as e:
+        return str(e)
+    for record in items:
+        record.birthday = bd
+    return 'Birthday set successfully'
+
+
+@input_error
+def birthdays(k):
+    try:
+        count = int(k, 10)
+    except ValueError:
+        return 'Number of birthdays must be a number'
+    if count < 1:
+        return 'Number of birthdays must be positive'
+    items = book.next_birthdays(count)
+    if len(items) == 0:
+        return 'No birthdays found'
+    return ''.join(str(record) for record in items)
 
 
 commands = {
@@ -362,6 +573,7 @@ commands = {
     'find': find,
     'change': change,
     'birthday': birthday,
+    'birthdays': birthdays,
 }
 
 exit_commands = [